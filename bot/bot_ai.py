@@ -6,17 +6,33 @@ Picks a random valid move. Runs as an async background task after each human mov
 import asyncio
 import logging
 import random
+from typing import Callable, Optional
 
-from bot.game_manager import game_manager
+from bot.game_engine import SIDES, TILES_BY_INDEX, PlayerState
+from bot.game_manager import ActiveSession, game_manager
 
 logger = logging.getLogger(__name__)
 
 # Set of bot telegram IDs (negative to avoid collision with real users)
-BOT_IDS = {-1, -2, -3, -4}
+BOT_IDS = frozenset({-1, -2, -3, -4})
 
+# is_bot_player(telegram_id) -> bool, bound directly to the set's membership test
+is_bot_player = BOT_IDS.__contains__
 
-def is_bot_player(telegram_id: int) -> bool:
-    return telegram_id in BOT_IDS
+_rand = random.random
+
+# Web-layer callbacks used by ai_play_for_player, registered by web.server via set_callbacks()
+_broadcast_fn: Optional[Callable] = None
+_game_over_fn: Optional[Callable] = None
+_trigger_bot_turns_fn: Optional[Callable] = None
+
+
+def set_callbacks(broadcast_fn: Callable, game_over_fn: Callable, trigger_bot_turns_fn: Callable):
+    """Register the broadcast / game-over / bot-trigger callbacks for AI takeover."""
+    global _broadcast_fn, _game_over_fn, _trigger_bot_turns_fn
+    _broadcast_fn = broadcast_fn
+    _game_over_fn = game_over_fn
+    _trigger_bot_turns_fn = trigger_bot_turns_fn
 
 
 async def maybe_play_bot_turns(game_id: str, broadcast_fn, handle_game_over_fn):
@@ -24,72 +40,61 @@ async def maybe_play_bot_turns(game_id: str, broadcast_fn, handle_game_over_fn):
     If the current player is a bot, play their turn after a short delay.
     Keeps playing as long as the current player is a bot.
     """
-    while True:
-        session = game_manager.get_session(game_id)
-        if not session or not session.engine:
-            return
-        if session.engine.state.status != "active":
-            return
-
-        current = session.engine.state.current_player
-        if not is_bot_player(current.telegram_id):
-            return  # It's a human's turn now
+    session = game_manager.get_session(game_id)
+    if not session:
+        return
 
-        # Small delay to make it feel natural
-        await asyncio.sleep(1.0 + random.random() * 0.5)
+    loop = asyncio.get_running_loop()
+    last_move_time = loop.time()
 
-        # Re-check state hasn't changed
-        session = game_manager.get_session(game_id)
-        if not session or not session.engine:
-            return
-        if session.engine.state.status != "active":
-            return
-        current = session.engine.state.current_player
-        if not is_bot_player(current.telegram_id):
+    while True:
+        current = _current_bot(session)
+        if not current:
+            return  # Game over or it's a human's turn now
+
+        # Small delay to make it feel natural — forced moves (one option or none) don't need it.
+        # Time already spent since the previous move (e.g. broadcasting it) counts toward the delay.
+        if len(session.engine.get_valid_moves_fast(current.telegram_id)) <= 1:
+            delay = 0.1
+        else:
+            delay = 1.0 + _rand() * 0.5
+        remaining = delay - (loop.time() - last_move_time)
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+
+        # Re-check state hasn't changed (the engine is reset for the next game)
+        current = _current_bot(session)
+        if not current:
             return
 
+        engine = session.engine
         bot_id = current.telegram_id
-        moves = session.engine.get_valid_moves(bot_id)
+        moves = engine.get_valid_moves_fast(bot_id)
+
+        if not moves:
+            # No valid moves — draw until we can play or the boneyard is empty.
+            # Draws are applied back-to-back; the broadcast below carries the final state.
+            drawn = 0
+            while game_manager.draw_tile(game_id, bot_id).get("success"):
+                drawn += 1
+                moves = engine.get_valid_moves_fast(bot_id)
+                if moves:
+                    break
+            if drawn:
+                logger.info(f"Bot {current.display_name} draws {drawn} tile(s) (boneyard: {len(engine.state.boneyard)})")
 
         if moves:
             # Pick a move — prefer doubles and high-pip tiles
-            move = _pick_best_move(moves)
-            tile = move["tile"]
-            side = move["side"]
-            result = game_manager.play_move(game_id, bot_id, tile.to_dict(), side)
+            index, side_code = _pick_best_move(moves)
+            tile = TILES_BY_INDEX[index]
+            side = SIDES[side_code]
+            result = game_manager.play_move_tile(game_id, bot_id, tile, side)
             logger.info(f"Bot {current.display_name} plays {tile} on {side}: {result}")
         else:
-            # No valid moves — draw from boneyard until we can play or it's empty
-            drew_playable = False
-            result = {"success": False, "error": "No action taken"}
-            while True:
-                draw_result = game_manager.draw_tile(game_id, bot_id)
-                if not draw_result.get("success"):
-                    break  # Boneyard empty or error
-                logger.info(f"Bot {current.display_name} draws a tile (boneyard: {draw_result['boneyard_count']})")
-
-                # Broadcast after each draw so players see the boneyard count change
-                if broadcast_fn:
-                    await broadcast_fn(game_id)
-                await asyncio.sleep(0.5)
-
-                # Re-check for valid moves
-                session = game_manager.get_session(game_id)
-                if not session or not session.engine:
-                    return
-                moves = session.engine.get_valid_moves(bot_id)
-                if moves:
-                    move = _pick_best_move(moves)
-                    tile = move["tile"]
-                    side = move["side"]
-                    result = game_manager.play_move(game_id, bot_id, tile.to_dict(), side)
-                    logger.info(f"Bot {current.display_name} plays {tile} on {side} (after drawing): {result}")
-                    drew_playable = True
-                    break
+            result = game_manager.pass_move(game_id, bot_id)
+            logger.info(f"Bot {current.display_name} passes (boneyard empty): {result}")
 
-            if not drew_playable:
-                result = game_manager.pass_move(game_id, bot_id)
-                logger.info(f"Bot {current.display_name} passes (boneyard empty): {result}")
+        last_move_time = loop.time()
 
         # Broadcast updated state
         if broadcast_fn:
@@ -103,83 +108,79 @@ async def maybe_play_bot_turns(game_id: str, broadcast_fn, handle_game_over_fn):
         # Loop to check if the next player is also a bot
 
 
+def _current_bot(session: ActiveSession) -> Optional[PlayerState]:
+    """Return the current player if the game is active and it's a bot's turn, else None."""
+    engine = session.engine
+    if not session.is_alive or not engine or engine.state.status != "active":
+        return None
+    current = engine.state.current_player
+    return current if is_bot_player(current.telegram_id) else None
+
+
 async def ai_play_for_player(game_id: str, player_telegram_id: int):
     """
     AI takeover for a timed-out human player. Plays one turn (draw + move or pass),
     then broadcasts state and triggers bot turns if needed.
-    Uses deferred import to get broadcast/game_over functions from server.
+    Uses the callbacks registered by the web server via set_callbacks().
     """
-    from web.server import _broadcast_state, _handle_game_over, _trigger_bot_turns
-
     session = game_manager.get_session(game_id)
-    if not session or not session.engine:
-        return
-    if session.engine.state.status != "active":
+    engine = session.engine if session else None
+    state = engine.state if engine else None
+    if not state or state.status != "active":
         return
-    current = session.engine.state.current_player
+    current = state.current_player
     if current.telegram_id != player_telegram_id:
         return  # Turn already changed
 
-    moves = session.engine.get_valid_moves(player_telegram_id)
+    moves = engine.get_valid_moves_fast(player_telegram_id)
 
-    if moves:
-        move = _pick_best_move(moves)
-        tile = move["tile"]
-        side = move["side"]
-        result = game_manager.play_move(game_id, player_telegram_id, tile.to_dict(), side)
-        logger.info(f"AI takeover: {current.display_name} plays {tile} on {side}: {result}")
-    else:
-        # Draw from boneyard until playable or empty, then pass
-        drew_playable = False
-        result = {"success": False, "error": "No action taken"}
-        while True:
-            draw_result = game_manager.draw_tile(game_id, player_telegram_id)
-            if not draw_result.get("success"):
-                break
-            logger.info(f"AI takeover: {current.display_name} draws (boneyard: {draw_result['boneyard_count']})")
-            await _broadcast_state(game_id)
-            await asyncio.sleep(0.3)
-
-            session = game_manager.get_session(game_id)
-            if not session or not session.engine:
-                return
-            moves = session.engine.get_valid_moves(player_telegram_id)
+    if not moves:
+        # Draw until playable or the boneyard is empty, then pass
+        drawn = 0
+        while game_manager.draw_tile(game_id, player_telegram_id).get("success"):
+            drawn += 1
+            moves = engine.get_valid_moves_fast(player_telegram_id)
             if moves:
-                move = _pick_best_move(moves)
-                tile = move["tile"]
-                side = move["side"]
-                result = game_manager.play_move(game_id, player_telegram_id, tile.to_dict(), side)
-                logger.info(f"AI takeover: {current.display_name} plays {tile} on {side} (after draw): {result}")
-                drew_playable = True
                 break
+        if drawn:
+            logger.info(f"AI takeover: {current.display_name} draws {drawn} tile(s) "
+                        f"(boneyard: {len(state.boneyard)})")
 
-        if not drew_playable:
-            result = game_manager.pass_move(game_id, player_telegram_id)
-            logger.info(f"AI takeover: {current.display_name} passes: {result}")
+    if moves:
+        index, side_code = _pick_best_move(moves)
+        tile = TILES_BY_INDEX[index]
+        side = SIDES[side_code]
+        result = game_manager.play_move_tile(game_id, player_telegram_id, tile, side)
+        logger.info(f"AI takeover: {current.display_name} plays {tile} on {side}: {result}")
+    else:
+        result = game_manager.pass_move(game_id, player_telegram_id)
+        logger.info(f"AI takeover: {current.display_name} passes: {result}")
 
-    await _broadcast_state(game_id)
+    if _broadcast_fn:
+        await _broadcast_fn(game_id)
 
     if result.get("game_over"):
-        await _handle_game_over(game_id)
+        if _game_over_fn:
+            await _game_over_fn(game_id)
     else:
         # Start timer for next player and trigger bot turns if needed
         game_manager.start_turn_timer(game_id)
-        await _trigger_bot_turns(game_id)
+        if _trigger_bot_turns_fn:
+            await _trigger_bot_turns_fn(game_id)
 
 
-def _pick_best_move(moves: list[dict]) -> dict:
+def _pick_best_move(moves: list[tuple[int, int]]) -> tuple[int, int]:
     """
     Simple heuristic: prefer playing doubles, then highest pip count.
     Adds a bit of randomness so it's not completely predictable.
     """
-    scored = []
-    for move in moves:
-        tile = move["tile"]
-        score = tile.left + tile.right
-        if tile.is_double():
-            score += 10  # Prefer playing doubles early
-        score += random.random() * 3  # Some randomness
-        scored.append((score, move))
-
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return scored[0][1]
+    return max(moves, key=_score_move)
+
+
+def _score_move(move: tuple[int, int]) -> float:
+    """Score a candidate (tile_index, side) move for _pick_best_move."""
+    tile = TILES_BY_INDEX[move[0]]
+    score = tile.pips
+    if tile.double:
+        score += 10  # Prefer playing doubles early
+    return score + _rand() * 3  # Some randomness
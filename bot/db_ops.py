@@ -3,87 +3,113 @@ Database operations for game history and scores.
 """
 
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from sqlalchemy import select, func, case, text
+from typing import AsyncIterator, Optional
+from sqlalchemy import select, func, case, text, and_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from bot.models import async_session_factory, Game, Session, Player, init_db
 
 logger = logging.getLogger(__name__)
 
 
-async def ensure_player(telegram_id: int, group_id: int, display_name: str, username: str = None):
-    """Ensure a player record exists."""
+@asynccontextmanager
+async def _session_scope(existing: Optional[AsyncSession]) -> AsyncIterator[AsyncSession]:
+    """
+    Yield the caller's session as-is (the caller commits), or open a new one
+    that is committed when the block exits.
+    """
+    if existing is not None:
+        yield existing
+        return
     async with async_session_factory() as session:
-        result = await session.execute(
-            select(Player).where(
-                Player.telegram_id == telegram_id,
-                Player.group_id == group_id,
-            )
-        )
-        player = result.scalar_one_or_none()
-        if not player:
-            player = Player(
-                telegram_id=telegram_id,
-                group_id=group_id,
-                display_name=display_name,
-                username=username,
-            )
-            session.add(player)
-        else:
-            player.display_name = display_name
-            player.username = username
+        yield session
         await session.commit()
 
 
-async def save_game_results(group_id: int, results: list[dict]):
+async def ensure_player(
+    telegram_id: int,
+    group_id: int,
+    display_name: str,
+    username: str = None,
+    session: Optional[AsyncSession] = None,
+):
+    """Ensure a player record exists, refreshing its name fields."""
+    async with _session_scope(session) as session:
+        stmt = sqlite_insert(Player).values(
+            telegram_id=telegram_id,
+            group_id=group_id,
+            display_name=display_name,
+            username=username,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["telegram_id", "group_id"],
+            set_={
+                "display_name": stmt.excluded.display_name,
+                "username": stmt.excluded.username,
+            },
+        )
+        await session.execute(stmt)
+
+
+async def save_game_results(group_id: int, results: list[dict], session: Optional[AsyncSession] = None):
     """
     Save game results for a completed session.
     results: [{"game_number": 1, "winner_telegram_id": int|None, "is_fish": bool}, ...]
     """
-    async with async_session_factory() as session:
-        db_session = Session(group_id=group_id, status="finished", finished_at=datetime.now(timezone.utc))
+    now = datetime.now(timezone.utc)
+    async with _session_scope(session) as session:
+        db_session = Session(group_id=group_id, status="finished", finished_at=now)
         session.add(db_session)
         await session.flush()
 
-        for r in results:
-            game = Game(
-                session_id=db_session.id,
-                group_id=group_id,
-                game_number=r["game_number"],
-                status="finished",
-                winner_telegram_id=r.get("winner_telegram_id"),
-                is_fish=r.get("is_fish", False),
-                finished_at=datetime.now(timezone.utc),
-            )
-            session.add(game)
-
-        await session.commit()
+        rows = [
+            {
+                "session_id": db_session.id,
+                "group_id": group_id,
+                "game_number": r["game_number"],
+                "status": "finished",
+                "winner_telegram_id": r.get("winner_telegram_id"),
+                "is_fish": r.get("is_fish", False),
+                "finished_at": now,
+            }
+            for r in results
+        ]
+        await session.execute(Game.__table__.insert(), rows)
         logger.info(f"Saved session results for group {group_id}: {results}")
 
 
-async def get_leaderboard(group_id: int) -> list[dict]:
+async def get_leaderboard(group_id: int, session: Optional[AsyncSession] = None) -> list[dict]:
     """
     Get the leaderboard for a group.
     Returns list of {"display_name": str, "wins": int, "is_fish": bool} sorted by wins desc.
     """
-    async with async_session_factory() as session:
-        # Count wins per player
+    async with _session_scope(session) as session:
+        # Count wins per player, resolving display names in the same query
         result = await session.execute(
             select(
+                Player.display_name,
                 Game.winner_telegram_id,
                 Game.is_fish,
                 func.count().label("wins"),
             )
+            .select_from(Game)
+            .outerjoin(
+                Player,
+                and_(
+                    Player.telegram_id == Game.winner_telegram_id,
+                    Player.group_id == Game.group_id,
+                ),
+            )
             .where(Game.group_id == group_id, Game.status == "finished")
-            .group_by(Game.winner_telegram_id, Game.is_fish)
+            .group_by(Game.winner_telegram_id, Game.is_fish, Player.display_name)
             .order_by(func.count().desc())
         )
-        rows = result.all()
 
         leaderboard = []
 
-        for row in rows:
-            winner_id, is_fish, wins = row
-
+        for display_name, winner_id, is_fish, wins in result.all():
             if is_fish:
                 leaderboard.append({
                     "display_name": "Fish",
@@ -92,22 +118,23 @@ async def get_leaderboard(group_id: int) -> list[dict]:
                     "telegram_id": None,
                 })
             elif winner_id:
-                # Look up player name
-                player_result = await session.execute(
-                    select(Player).where(
-                        Player.telegram_id == winner_id,
-                        Player.group_id == group_id,
-                    )
-                )
-                player = player_result.scalar_one_or_none()
-                name = player.display_name if player else f"Player {winner_id}"
                 leaderboard.append({
-                    "display_name": name,
+                    "display_name": display_name or f"Player {winner_id}",
                     "wins": wins,
                     "is_fish": False,
                     "telegram_id": winner_id,
                 })
 
-        # Sort by wins descending
-        leaderboard.sort(key=lambda x: x["wins"], reverse=True)
         return leaderboard
+
+
+async def save_results_and_fetch_leaderboard(group_id: int, results: list[dict]) -> list[dict]:
+    """
+    Save a completed session's results and return the updated leaderboard, in one DB session and commit.
+    results: same format as save_game_results
+    """
+    async with async_session_factory() as session:
+        await save_game_results(group_id, results, session=session)
+        leaderboard = await get_leaderboard(group_id, session=session)
+        await session.commit()
+    return leaderboard
@@ -4,85 +4,126 @@ Standard double-six set (28 tiles).
 """
 
 import random
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Iterator, NamedTuple, Optional
 from bot.config import TILES_PER_PLAYER
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Tile:
+    """A domino tile, stored in canonical orientation (left <= right)."""
     left: int
     right: int
-
-    def __eq__(self, other):
-        if not isinstance(other, Tile):
-            return False
-        return (self.left == other.left and self.right == other.right) or \
-               (self.left == other.right and self.right == other.left)
-
-    def __hash__(self):
-        return hash((min(self.left, self.right), max(self.left, self.right)))
+    # Derived values, cached at construction since tiles are immutable
+    pips: int = field(init=False, repr=False, compare=False)
+    double: bool = field(init=False, repr=False, compare=False)
+    _hash: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Canonical orientation makes the generated __eq__/__hash__ orientation-independent
+        if self.left > self.right:
+            left, right = self.right, self.left
+            object.__setattr__(self, "left", left)
+            object.__setattr__(self, "right", right)
+        object.__setattr__(self, "pips", self.left + self.right)
+        object.__setattr__(self, "double", self.left == self.right)
+        object.__setattr__(self, "_hash", hash((self.left, self.right)))
+
+    def __hash__(self) -> int:
+        return self._hash
 
     def has_value(self, value: int) -> bool:
         return self.left == value or self.right == value
 
-    def is_double(self) -> bool:
-        return self.left == self.right
-
     def to_dict(self) -> dict:
         return {"left": self.left, "right": self.right}
 
     @staticmethod
     def from_dict(d: dict) -> "Tile":
-        return Tile(left=d["left"], right=d["right"])
+        """Return the interned set tile for a {"left", "right"} dict, in either orientation."""
+        left, right = d["left"], d["right"]
+        tile = _TILE_LOOKUP.get((left, right) if left <= right else (right, left))
+        return tile if tile is not None else Tile(left=left, right=right)
 
     def __repr__(self):
         return f"[{self.left}|{self.right}]"
 
 
-def create_full_set() -> list[Tile]:
-    """Create a standard double-six domino set (28 tiles)."""
-    tiles = []
-    for i in range(7):
-        for j in range(i, 7):
-            tiles.append(Tile(left=i, right=j))
-    return tiles
-
-
-@dataclass
+# The 28 tiles of the double-six set, interned: the engine only ever hands out these instances.
+# Hands are bitmasks over this tuple: bit i set means the player holds TILES_BY_INDEX[i].
+TILES_BY_INDEX: tuple[Tile, ...] = tuple(Tile(left=i, right=j) for i in range(7) for j in range(i, 7))
+TILE_INDEX: dict[tuple[int, int], int] = {(t.left, t.right): i for i, t in enumerate(TILES_BY_INDEX)}
+_TILE_LOOKUP: dict[tuple[int, int], Tile] = {(t.left, t.right): t for t in TILES_BY_INDEX}
+# TILES_WITH_VALUE[v] — mask of every tile showing pip value v on either half
+TILES_WITH_VALUE: list[int] = [
+    sum(1 << i for i, t in enumerate(TILES_BY_INDEX) if t.has_value(v))
+    for v in range(7)
+]
+ALL_TILES_MASK: int = (1 << len(TILES_BY_INDEX)) - 1
+TILE_DOUBLE_MASK: int = sum(1 << i for i, t in enumerate(TILES_BY_INDEX) if t.double)
+# Single double bit -> its pip value
+_DOUBLE_PIP_BY_BIT: dict[int, int] = {1 << TILE_INDEX[(v, v)]: v for v in range(7)}
+# Board sides, indexed by the side codes returned from get_valid_moves_fast
+SIDE_LEFT = 0
+SIDE_RIGHT = 1
+SIDES: tuple[str, str] = ("left", "right")
+
+
+def tile_bit(tile: Tile) -> int:
+    """Return the hand bit for a tile (0 for a tile outside the set)."""
+    index = TILE_INDEX.get((tile.left, tile.right))
+    return 0 if index is None else 1 << index
+
+
+def tiles_to_mask(tiles: list[Tile]) -> int:
+    """Build a hand bitmask from a list of tiles."""
+    mask = 0
+    for tile in tiles:
+        mask |= tile_bit(tile)
+    return mask
+
+
+def iter_mask(mask: int) -> Iterator[int]:
+    """Yield the tile indexes set in a hand bitmask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+@dataclass(slots=True)
 class PlayerState:
     telegram_id: int
     display_name: str
-    hand: list[Tile] = field(default_factory=list)
+    hand: int = 0  # Bitmask over TILES_BY_INDEX
     passed_last_turn: bool = False
 
+    def tiles(self) -> list[Tile]:
+        """Return the hand as a list of tiles (for serialization)."""
+        return [TILES_BY_INDEX[i] for i in iter_mask(self.hand)]
+
     def tile_count(self) -> int:
-        return len(self.hand)
-
-    def has_playable_tile(self, left_end: int, right_end: int) -> bool:
-        """Check if the player has any tile that can be played."""
-        for tile in self.hand:
-            if tile.has_value(left_end) or tile.has_value(right_end):
-                return True
-        return False
-
-    def remove_tile(self, tile: Tile) -> bool:
-        """Remove a tile from hand. Returns True if found and removed."""
-        for i, t in enumerate(self.hand):
-            if t == tile:
-                self.hand.pop(i)
-                return True
-        return False
-
-
-@dataclass
-class BoardTile:
-    """A tile placed on the board with its orientation."""
-    tile: Tile
+        return self.hand.bit_count()
+
+    def has_tile(self, tile: Tile) -> bool:
+        return bool(self.hand & tile_bit(tile))
+
+    def add_tile(self, tile: Tile):
+        self.hand |= tile_bit(tile)
+
+
+class BoardTile(NamedTuple):
+    """A tile placed on the board with its orientation, stored as a plain tuple of ints."""
     # The value exposed on the left side of this placed tile
     exposed_left: int
     # The value exposed on the right side of this placed tile
     exposed_right: int
+    tile_idx: int  # Index into TILES_BY_INDEX
+
+    @property
+    def tile(self) -> Tile:
+        return TILES_BY_INDEX[self.tile_idx]
 
     def to_dict(self) -> dict:
         return {
@@ -92,10 +133,10 @@ class BoardTile:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class GameState:
     players: list[PlayerState]
-    board: list[BoardTile] = field(default_factory=list)
+    board: deque[BoardTile] = field(default_factory=deque)
     boneyard: list[Tile] = field(default_factory=list)
     current_player_index: int = 0
     status: str = "waiting"  # waiting, active, finished
@@ -103,40 +144,68 @@ class GameState:
     is_fish: bool = False
     consecutive_passes: int = 0
     first_tile_index: int = 0  # index of the first tile played (center of the board)
-
-    @property
-    def current_player(self) -> PlayerState:
-        return self.players[self.current_player_index]
-
-    @property
-    def left_end(self) -> Optional[int]:
-        if not self.board:
-            return None
-        return self.board[0].exposed_left
-
-    @property
-    def right_end(self) -> Optional[int]:
-        if not self.board:
-            return None
-        return self.board[-1].exposed_right
+    # Values exposed at the board ends (None while the board is empty), kept in sync by play_tile
+    left_end: Optional[int] = None
+    right_end: Optional[int] = None
+    # Mask of tiles that fit either board end (any tile while the board is empty), kept in sync by play_tile
+    playable_mask: int = ALL_TILES_MASK
+    # Cached players[current_player_index], kept in sync by set_current_player/next_turn
+    current_player: PlayerState = field(init=False, repr=False)
+    num_players: int = field(init=False, repr=False)  # Fixed for the whole game
+    # Bumped by the engine on every mutation; to_dict rebuilds its public part only when it changes
+    version: int = 0
+    _cached_version: int = field(default=-1, init=False, repr=False)
+    _cached_dict: Optional[dict] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        self.current_player = self.players[self.current_player_index]
+        self.num_players = len(self.players)
+
+    def set_current_player(self, index: int):
+        """Make the player at the given index the current player."""
+        self.current_player_index = index
+        self.current_player = self.players[index]
 
     def next_turn(self):
         """Advance to the next player."""
-        self.current_player_index = (self.current_player_index + 1) % len(self.players)
+        index = (self.current_player_index + 1) % self.num_players
+        self.current_player_index = index
+        self.current_player = self.players[index]
 
     def to_dict(self, for_player_id: Optional[int] = None) -> dict:
-        """Serialize game state. If for_player_id is given, only show that player's hand."""
-        players_data = []
-        for p in self.players:
-            pd = {
+        """
+        Serialize game state. If for_player_id is given, only show that player's hand.
+        The public part is cached per version and shared between calls, so treat nested values as read-only.
+        """
+        if self._cached_version != self.version:
+            self._cached_dict = self._build_public_dict()
+            self._cached_version = self.version
+
+        if for_player_id is None:
+            return dict(self._cached_dict)
+        return self.with_hand(self._cached_dict, for_player_id)
+
+    def with_hand(self, data: dict, player_id: int) -> dict:
+        """Return a copy of a serialized state (e.g. from to_dict()) with that player's hand spliced in."""
+        return {
+            **data,
+            "players": [
+                {**pd, "hand": [t.to_dict() for t in p.tiles()]} if p.telegram_id == player_id else pd
+                for p, pd in zip(self.players, data["players"])
+            ],
+        }
+
+    def _build_public_dict(self) -> dict:
+        """Serialize the parts of the state every player can see."""
+        players_data = [
+            {
                 "telegram_id": p.telegram_id,
                 "display_name": p.display_name,
                 "tile_count": p.tile_count(),
                 "passed_last_turn": p.passed_last_turn,
             }
-            if for_player_id is not None and p.telegram_id == for_player_id:
-                pd["hand"] = [t.to_dict() for t in p.hand]
-            players_data.append(pd)
+            for p in self.players
+        ]
 
         return {
             "players": players_data,
@@ -165,29 +234,46 @@ class DominoEngine:
         if num_players < 3 or num_players > 5:
             raise ValueError(f"Need 3-5 players, got {num_players}")
 
-        tiles_per_player = TILES_PER_PLAYER[num_players]
+        players = [
+            PlayerState(telegram_id=info["telegram_id"], display_name=info["display_name"])
+            for info in player_infos
+        ]
+        self.state = GameState(players=players)
+        self._player_by_id: dict[int, PlayerState] = {p.telegram_id: p for p in players}
+        self._deal()
+
+    def reset(self):
+        """Start a new game with the same players, reusing the existing state and player objects."""
+        state = self.state
+        state.board.clear()
+        state.winner_telegram_id = None
+        state.is_fish = False
+        state.consecutive_passes = 0
+        state.first_tile_index = 0
+        state.left_end = None
+        state.right_end = None
+        state.playable_mask = ALL_TILES_MASK
+        for player in state.players:
+            player.passed_last_turn = False
+        self._deal()
+        state.version += 1
+
+    def _deal(self):
+        """Shuffle the set, deal every hand, fill the boneyard and pick the first player."""
+        state = self.state
+        tiles_per_player = TILES_PER_PLAYER[state.num_players]
 
-        # Create and shuffle tiles
-        all_tiles = create_full_set()
-        random.shuffle(all_tiles)
+        # Shuffle the interned set in one pass
+        all_tiles = random.sample(TILES_BY_INDEX, len(TILES_BY_INDEX))
 
-        # Create players and deal tiles
-        players = []
-        for i, info in enumerate(player_infos):
-            hand = all_tiles[i * tiles_per_player:(i + 1) * tiles_per_player]
-            players.append(PlayerState(
-                telegram_id=info["telegram_id"],
-                display_name=info["display_name"],
-                hand=hand,
-            ))
+        for i, player in enumerate(state.players):
+            player.hand = tiles_to_mask(all_tiles[i * tiles_per_player:(i + 1) * tiles_per_player])
 
         # Leftover tiles go to the boneyard (shop)
-        dealt_count = num_players * tiles_per_player
-        boneyard = all_tiles[dealt_count:]
+        state.boneyard[:] = all_tiles[state.num_players * tiles_per_player:]
 
-        self.state = GameState(players=players, boneyard=boneyard)
         self._determine_first_player()
-        self.state.status = "active"
+        state.status = "active"
 
     def _determine_first_player(self):
         """
@@ -199,26 +285,28 @@ class DominoEngine:
         best_double = 7  # Sentinel above max (6)
 
         for i, player in enumerate(self.state.players):
-            for tile in player.hand:
-                if tile.is_double() and tile.left < best_double:
-                    best_double = tile.left
+            doubles = player.hand & TILE_DOUBLE_MASK
+            if doubles:
+                # Doubles are indexed in pip order, so the lowest set bit is the player's lowest double
+                pip = _DOUBLE_PIP_BY_BIT[doubles & -doubles]
+                if pip < best_double:
+                    best_double = pip
                     best_player_index = i
 
         if best_double < 7:
             # Store the required first tile
-            self._forced_first_tile = Tile(left=best_double, right=best_double)
+            self._forced_first_tile = _TILE_LOOKUP[(best_double, best_double)]
         else:
             # No doubles — find highest pip total
             self._forced_first_tile = None
             best_total = -1
             for i, player in enumerate(self.state.players):
-                for tile in player.hand:
-                    total = tile.left + tile.right
-                    if total > best_total:
-                        best_total = total
-                        best_player_index = i
+                total = max(TILES_BY_INDEX[b].pips for b in iter_mask(player.hand))
+                if total > best_total:
+                    best_total = total
+                    best_player_index = i
 
-        self.state.current_player_index = best_player_index
+        self.state.set_current_player(best_player_index)
 
     def get_valid_moves(self, player_telegram_id: int) -> list[dict]:
         """
@@ -226,36 +314,32 @@ class DominoEngine:
         Returns list of {"tile": Tile, "side": "left"|"right"} dicts.
         For the first move, side is "left" (doesn't matter).
         """
+        return [
+            {"tile": TILES_BY_INDEX[index], "side": SIDES[side]}
+            for index, side in self.get_valid_moves_fast(player_telegram_id)
+        ]
+
+    def get_valid_moves_fast(self, player_telegram_id: int) -> list[tuple[int, int]]:
+        """
+        Get all valid moves for a player without building dicts (used by the bot AI).
+        Returns list of (tile_index, side) tuples: tile_index into TILES_BY_INDEX, side into SIDES.
+        """
         player = self._get_player(player_telegram_id)
         if not player:
             return []
 
-        moves = []
-
         if not self.state.board:
             # First move — must play the qualifying double if one exists
-            if self._forced_first_tile and self._forced_first_tile in player.hand:
-                moves.append({"tile": self._forced_first_tile, "side": "left"})
-            else:
-                # No forced tile (no doubles existed) — any tile can be played
-                for tile in player.hand:
-                    moves.append({"tile": tile, "side": "left"})
-            return moves
-
-        left_end = self.state.left_end
-        right_end = self.state.right_end
-
-        for tile in player.hand:
-            if tile.has_value(left_end):
-                moves.append({"tile": tile, "side": "left"})
-            if tile.has_value(right_end):
-                # Avoid duplicate if tile matches both ends and both ends are same value
-                if left_end != right_end or not tile.has_value(left_end):
-                    moves.append({"tile": tile, "side": "right"})
-                elif left_end == right_end and tile.has_value(left_end):
-                    # Tile matches both ends (which are the same) — also offer right
-                    moves.append({"tile": tile, "side": "right"})
-
+            if self._forced_first_tile and player.has_tile(self._forced_first_tile):
+                return [(TILE_INDEX[(self._forced_first_tile.left, self._forced_first_tile.right)], SIDE_LEFT)]
+            # No forced tile (no doubles existed) — any tile can be played
+            return [(i, SIDE_LEFT) for i in iter_mask(player.hand)]
+
+        # A tile that matches both ends is offered on both sides (even when the ends are equal,
+        # so the player can choose which end of the board to extend).
+        hand = player.hand
+        moves = [(i, SIDE_LEFT) for i in iter_mask(hand & TILES_WITH_VALUE[self.state.left_end])]
+        moves.extend((i, SIDE_RIGHT) for i in iter_mask(hand & TILES_WITH_VALUE[self.state.right_end]))
         return moves
 
     def draw_tile(self, player_telegram_id: int) -> dict:
@@ -281,12 +365,13 @@ class DominoEngine:
                     "boneyard_count": 0}
 
         # Player must have no valid moves to draw
-        if self.get_valid_moves(player_telegram_id):
+        if player.hand & self.state.playable_mask:
             return {"success": False, "error": "You have playable tiles, cannot draw",
                     "tile": None, "boneyard_count": len(self.state.boneyard)}
 
         drawn = self.state.boneyard.pop()
-        player.hand.append(drawn)
+        player.add_tile(drawn)
+        self.state.version += 1
 
         return {"success": True, "error": None, "tile": drawn.to_dict(),
                 "boneyard_count": len(self.state.boneyard)}
@@ -306,19 +391,20 @@ class DominoEngine:
         if player.telegram_id != self.state.current_player.telegram_id:
             return {"success": False, "error": "Not your turn", "game_over": False, "is_fish": False}
 
-        # Check player has this tile
-        if tile not in player.hand:
+        # Check player has this tile (its bit is cleared from the hand once placed)
+        bit = tile_bit(tile)
+        if not player.hand & bit:
             return {"success": False, "error": "You don't have this tile", "game_over": False, "is_fish": False}
 
+        index = bit.bit_length() - 1
+
         # First tile on empty board
         if not self.state.board:
-            board_tile = BoardTile(
-                tile=tile,
-                exposed_left=tile.left,
-                exposed_right=tile.right,
-            )
-            self.state.board.append(board_tile)
-            player.remove_tile(tile)
+            self.state.board.append(BoardTile(tile.left, tile.right, index))
+            self.state.left_end = tile.left
+            self.state.right_end = tile.right
+            self.state.playable_mask = TILES_WITH_VALUE[tile.left] | TILES_WITH_VALUE[tile.right]
+            player.hand ^= bit
             player.passed_last_turn = False
             self.state.consecutive_passes = 0
             return self._after_play(player)
@@ -336,21 +422,18 @@ class DominoEngine:
 
         # Place the tile
         if side == "left":
-            # The tile's matching value connects to the board's left end
-            if tile.right == target_value:
-                board_tile = BoardTile(tile=tile, exposed_left=tile.left, exposed_right=tile.right)
-            else:
-                board_tile = BoardTile(tile=tile, exposed_left=tile.right, exposed_right=tile.left)
-            self.state.board.insert(0, board_tile)
+            # The tile's matching value connects to the board's left end; the other one is exposed
+            exposed = tile.left if tile.right == target_value else tile.right
+            self.state.board.appendleft(BoardTile(exposed, target_value, index))
+            self.state.left_end = exposed
             self.state.first_tile_index += 1
         else:  # right
-            if tile.left == target_value:
-                board_tile = BoardTile(tile=tile, exposed_left=tile.left, exposed_right=tile.right)
-            else:
-                board_tile = BoardTile(tile=tile, exposed_left=tile.right, exposed_right=tile.left)
-            self.state.board.append(board_tile)
+            exposed = tile.right if tile.left == target_value else tile.left
+            self.state.board.append(BoardTile(target_value, exposed, index))
+            self.state.right_end = exposed
+        self.state.playable_mask = TILES_WITH_VALUE[self.state.left_end] | TILES_WITH_VALUE[self.state.right_end]
 
-        player.remove_tile(tile)
+        player.hand ^= bit
         player.passed_last_turn = False
         self.state.consecutive_passes = 0
         return self._after_play(player)
@@ -372,7 +455,7 @@ class DominoEngine:
 
         # Check that the player truly has no valid moves
         if self.state.board:
-            if player.has_playable_tile(self.state.left_end, self.state.right_end):
+            if player.hand & self.state.playable_mask:
                 return {"success": False, "error": "You have playable tiles, cannot pass", "game_over": False, "is_fish": False}
 
         # Cannot pass if boneyard still has tiles — must draw instead
@@ -381,9 +464,10 @@ class DominoEngine:
 
         player.passed_last_turn = True
         self.state.consecutive_passes += 1
+        self.state.version += 1
 
         # Check for fish: all players passed in a row
-        if self.state.consecutive_passes >= len(self.state.players):
+        if self.state.consecutive_passes >= self.state.num_players:
             self.state.status = "finished"
             self.state.is_fish = True
             self.state.winner_telegram_id = None
@@ -398,6 +482,7 @@ class DominoEngine:
 
     def _after_play(self, player: PlayerState) -> dict:
         """Check win condition and advance turn after a successful play."""
+        self.state.version += 1
         if player.tile_count() == 0:
             self.state.status = "finished"
             self.state.winner_telegram_id = player.telegram_id
@@ -416,34 +501,45 @@ class DominoEngine:
         If all players are blocked (and boneyard is empty), it's a fish.
         When boneyard has tiles, stop at the first blocked player so they can draw.
         """
-        if self.state.status != "active":
+        state = self.state
+        if state.status != "active":
             return
 
-        checked = 0
-        while checked < len(self.state.players):
-            current = self.state.current_player
-            if current.has_playable_tile(self.state.left_end, self.state.right_end):
-                return  # This player can play
-
-            # If boneyard has tiles, stop here — player must draw manually (or bot AI draws)
-            if self.state.boneyard:
-                return
+        playable_mask = state.playable_mask
+        if state.current_player.hand & playable_mask:
+            return  # This player can play
 
-            current.passed_last_turn = True
-            self.state.consecutive_passes += 1
+        # If boneyard has tiles, stop here — player must draw manually (or bot AI draws)
+        if state.boneyard:
+            return
 
-            if self.state.consecutive_passes >= len(self.state.players):
-                # Fish!
-                self.state.status = "finished"
-                self.state.is_fish = True
-                self.state.winner_telegram_id = None
-                return
+        # Boneyard is empty: every player up to the first one who can play passes (all of them if nobody can)
+        players = state.players
+        num_players = state.num_players
+        start = state.current_player_index
+        skipped = next(
+            (offset for offset in range(1, num_players) if players[(start + offset) % num_players].hand & playable_mask),
+            num_players,
+        )
+
+        # The fish lands as soon as the pass streak covers every player
+        is_fish = state.consecutive_passes + skipped >= num_players
+        if is_fish:
+            skipped = num_players - state.consecutive_passes
+
+        for offset in range(skipped):
+            players[(start + offset) % num_players].passed_last_turn = True
+        state.consecutive_passes += skipped
+
+        if is_fish:
+            # Fish!
+            state.set_current_player((start + skipped - 1) % num_players)
+            state.status = "finished"
+            state.is_fish = True
+            state.winner_telegram_id = None
+            return
 
-            self.state.next_turn()
-            checked += 1
+        state.set_current_player((start + skipped) % num_players)
 
     def _get_player(self, telegram_id: int) -> Optional[PlayerState]:
-        for p in self.state.players:
-            if p.telegram_id == telegram_id:
-                return p
-        return None
+        return self._player_by_id.get(telegram_id)
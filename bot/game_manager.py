@@ -15,14 +15,21 @@ from bot.config import MIN_PLAYERS, MAX_PLAYERS, LOBBY_TIMEOUT, GAMES_PER_SESSIO
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class LobbyPlayer:
     telegram_id: int
     display_name: str
     username: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
+class GroupState:
+    """The one lobby or active session a group currently has."""
+    phase: str  # lobby, active
+    game_id: str
+
+
+@dataclass(slots=True)
 class Lobby:
     game_id: str
     group_id: int
@@ -32,7 +39,7 @@ class Lobby:
     message_id: Optional[int] = None  # Bot message to update
 
 
-@dataclass
+@dataclass(slots=True)
 class ActiveSession:
     session_id: str
     group_id: int
@@ -43,6 +50,12 @@ class ActiveSession:
     results: list[dict] = field(default_factory=list)  # Results of each game
     turn_timer_task: Optional[asyncio.Task] = None
     turn_deadline: Optional[float] = None  # Unix timestamp when turn expires
+    is_alive: bool = True  # Cleared when the session is torn down
+
+    @property
+    def state_version(self) -> int:
+        """Version of the current game state — bumped by the engine on every play, draw, pass and reset."""
+        return self.engine.state.version if self.engine else 0
 
 
 class GameManager:
@@ -51,8 +64,7 @@ class GameManager:
     def __init__(self):
         self.lobbies: dict[str, Lobby] = {}          # game_id -> Lobby
         self.sessions: dict[str, ActiveSession] = {}  # game_id -> ActiveSession
-        self.group_lobbies: dict[int, str] = {}       # group_id -> game_id (one lobby per group)
-        self.group_sessions: dict[int, str] = {}      # group_id -> game_id (one active session per group)
+        self.groups: dict[int, GroupState] = {}       # group_id -> lobby or active session (one per group)
 
         # Callbacks
         self._on_lobby_timeout: Optional[Callable] = None
@@ -87,15 +99,16 @@ class GameManager:
         Returns (game_id, message) or (None, error_message).
         """
         # Check if there's already an active lobby or game in this group
-        if group_id in self.group_lobbies:
-            return None, "There's already a game lobby open in this group!"
-        if group_id in self.group_sessions:
+        group = self.groups.get(group_id)
+        if group:
+            if group.phase == "lobby":
+                return None, "There's already a game lobby open in this group!"
             return None, "There's already a game in progress in this group!"
 
         game_id = self._next_id()
         lobby = Lobby(game_id=game_id, group_id=group_id, players=[creator])
         self.lobbies[game_id] = lobby
-        self.group_lobbies[group_id] = game_id
+        self.groups[group_id] = GroupState(phase="lobby", game_id=game_id)
 
         return game_id, f"{creator.display_name} started a game! Waiting for players..."
 
@@ -190,9 +203,8 @@ class GameManager:
 
         # Clean up lobby, set up session
         del self.lobbies[game_id]
-        del self.group_lobbies[lobby.group_id]
         self.sessions[game_id] = session
-        self.group_sessions[lobby.group_id] = game_id
+        self.groups[lobby.group_id].phase = "active"
 
         player_names = ", ".join(p.display_name for p in lobby.players)
         return True, f"Game started! Players: {player_names}", session
@@ -228,7 +240,7 @@ class GameManager:
         """Remove a lobby."""
         lobby = self.lobbies.pop(game_id, None)
         if lobby:
-            self.group_lobbies.pop(lobby.group_id, None)
+            self.groups.pop(lobby.group_id, None)
             if lobby.timer_task and not lobby.timer_task.done():
                 lobby.timer_task.cancel()
 
@@ -241,7 +253,19 @@ class GameManager:
         if not session or not session.engine:
             return {"success": False, "error": "Game not found"}
 
-        tile = Tile.from_dict(tile_dict)
+        # tile_dict comes straight from client JSON; Tile ordering needs real ints
+        if not isinstance(tile_dict, dict) or type(tile_dict.get("left")) is not int \
+                or type(tile_dict.get("right")) is not int:
+            return {"success": False, "error": "Invalid tile", "game_over": False, "is_fish": False}
+
+        return session.engine.play_tile(player_telegram_id, Tile.from_dict(tile_dict), side)
+
+    def play_move_tile(self, game_id: str, player_telegram_id: int, tile: Tile, side: str) -> dict:
+        """Play a tile move with an engine Tile (bot path, no dict round-trip)."""
+        session = self.sessions.get(game_id)
+        if not session or not session.engine:
+            return {"success": False, "error": "Game not found"}
+
         result = session.engine.play_tile(player_telegram_id, tile, side)
         return result
 
@@ -315,11 +339,21 @@ class GameManager:
 
     def get_game_state(self, game_id: str, for_player_id: Optional[int] = None) -> Optional[dict]:
         """Get the current game state."""
+        state = self.get_public_state(game_id)
+        if state is not None and for_player_id is not None:
+            state = self.sessions[game_id].engine.state.with_hand(state, for_player_id)
+        return state
+
+    def get_public_state(self, game_id: str) -> Optional[dict]:
+        """
+        Get the current game state with no hand revealed.
+        Broadcasts build it once and personalize it per player with engine.state.with_hand().
+        """
         session = self.sessions.get(game_id)
         if not session or not session.engine:
             return None
 
-        state = session.engine.state.to_dict(for_player_id=for_player_id)
+        state = session.engine.state.to_dict()
         state["game_id"] = game_id
         state["session_id"] = session.session_id
         state["game_number"] = session.game_number
@@ -356,7 +390,7 @@ class GameManager:
         if session.game_number < GAMES_PER_SESSION:
             # Start next game
             session.game_number += 1
-            session.engine = DominoEngine(session.player_infos)
+            engine.reset()
             return {
                 "action": "next_game",
                 "game_number": session.game_number,
@@ -374,7 +408,8 @@ class GameManager:
                 "player_infos": session.player_infos,
             }
             # Cleanup
-            self.group_sessions.pop(session.group_id, None)
+            session.is_alive = False
+            self.groups.pop(session.group_id, None)
             del self.sessions[game_id]
             return result
 
@@ -393,7 +428,8 @@ class GameManager:
 
     def get_group_game_id(self, group_id: int) -> Optional[str]:
         """Get the active game_id for a group (lobby or active)."""
-        return self.group_lobbies.get(group_id) or self.group_sessions.get(group_id)
+        group = self.groups.get(group_id)
+        return group.game_id if group else None
 
     def create_test_game(self, human_id: int, human_name: str, num_bots: int = 2) -> str:
         """
@@ -426,7 +462,7 @@ class GameManager:
         )
 
         self.sessions[game_id] = session
-        self.group_sessions[test_group_id] = game_id
+        self.groups[test_group_id] = GroupState(phase="active", game_id=game_id)
 
         logger.info(f"Test game created: {game_id} with {len(player_infos)} players")
         return game_id
@@ -9,9 +9,15 @@ import sys
 import os
 
 import uvicorn
+from telegram import Update
+
+try:
+    import uvloop
+except ImportError:  # uvicorn[standard] doesn't install uvloop on Windows
+    uvloop = None
 
 from bot.config import WEB_HOST, WEB_PORT
-from bot.models import init_db
+from bot.models import engine as db_engine, init_db
 from bot.telegram_bot import create_bot_app
 
 logging.basicConfig(
@@ -32,29 +38,36 @@ async def run_web_server():
         host=WEB_HOST,
         port=WEB_PORT,
         log_level="info",
+        # Pinned explicitly (uvicorn[standard] installs both) instead of relying on "auto" detection
+        http="httptools",
+        ws="websockets",
+        lifespan="on",
     )
     server = uvicorn.Server(config)
     await server.serve()
 
 
-async def run_bot():
-    """Run the Telegram bot with polling."""
+async def run_bot(stop_event: asyncio.Event):
+    """Run the Telegram bot with polling until stop_event is set (or the task is cancelled)."""
     global bot_app
     app = create_bot_app()
     bot_app = app
 
     await app.initialize()
     await app.start()
-    await app.updater.start_polling(drop_pending_updates=True)
+    # Long-poll (getUpdates holds the request open up to 30 s) and only ask for the update types we handle
+    await app.updater.start_polling(
+        drop_pending_updates=True,
+        timeout=30,
+        poll_interval=0,
+        allowed_updates=[Update.MESSAGE, Update.CALLBACK_QUERY],
+    )
 
     logger.info("Bot is running...")
 
-    # Keep running until cancelled
+    # Idle without waking the loop until shutdown is requested
     try:
-        while True:
-            await asyncio.sleep(1)
-    except asyncio.CancelledError:
-        pass
+        await stop_event.wait()
     finally:
         await app.updater.stop()
         await app.stop()
@@ -65,10 +78,19 @@ async def main():
     """Run both the bot and web server concurrently."""
     # Initialize database
     await init_db()
-    logger.info("Database initialized.")
+    logger.info(f"Database initialized. Pool: {db_engine.pool.status()}")
+
+    # SIGINT/SIGTERM stop the bot; uvicorn handles them for the web server and re-raises them on exit
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:  # Windows
+            pass
 
     # Run both concurrently
-    bot_task = asyncio.create_task(run_bot())
+    bot_task = asyncio.create_task(run_bot(stop_event))
     web_task = asyncio.create_task(run_web_server())
 
     logger.info(f"Web server starting on {WEB_HOST}:{WEB_PORT}")
@@ -84,6 +106,9 @@ async def main():
 
 
 if __name__ == "__main__":
+    # The web server shares this loop, so uvloop has to be installed here rather than via uvicorn.Config(loop=...)
+    if uvloop:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, ForeignKey, func
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, ForeignKey, Index, event, func, text
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from bot.config import DATABASE_URL
 import os
 
@@ -19,6 +20,7 @@ class Player(Base):
 
     __table_args__ = (
         # Unique per user per group
+        Index("ix_player_tg_group", "telegram_id", "group_id", unique=True),
         {"sqlite_autoincrement": True},
     )
 
@@ -32,7 +34,8 @@ class Session(Base):
     created_at = Column(DateTime, server_default=func.now())
     finished_at = Column(DateTime, nullable=True)
 
-    games = relationship("Game", back_populates="session")
+    # Loaded with one IN query per batch of sessions (lazy loading isn't usable under asyncio anyway)
+    games = relationship("Game", back_populates="session", lazy="selectin")
 
 
 class Game(Base):
@@ -50,18 +53,68 @@ class Game(Base):
 
     session = relationship("Session", back_populates="games")
 
+    __table_args__ = (
+        # Leaderboard filters finished games per group
+        Index("ix_game_group_status", "group_id", "status"),
+        # Loading a session's games (Session.games) looks them up by session_id
+        Index("ix_game_session", "session_id"),
+    )
+
 
 # Engine and session factory
-engine = create_async_engine(DATABASE_URL, echo=False)
+# Pooled (the aiosqlite default is NullPool) so connections and their pragmas are reused across sessions
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=5,
+    max_overflow=10,  # Extra short-lived connections under bursts (e.g. several sessions ending at once)
+    pool_recycle=3600,
+    connect_args={"check_same_thread": False},
+)
 async_session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply SQLite pragmas to every new connection (most are per-connection, not persisted)."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")  # Readers don't block the writer
+    cursor.execute("PRAGMA synchronous=NORMAL")  # fsync at checkpoints, not every commit
+    cursor.execute("PRAGMA busy_timeout=5000")  # Wait up to 5 s for a lock instead of failing
+    cursor.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cursor.close()
+
+
+# Indexes added after tables were first released. create_all only builds indexes for tables it creates,
+# so existing databases get them here (IF NOT EXISTS makes these no-ops on fresh ones).
+_BACKFILL_INDEXES = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_player_tg_group ON players (telegram_id, group_id)",
+    "CREATE INDEX IF NOT EXISTS ix_game_group_status ON games (group_id, status)",
+    "CREATE INDEX IF NOT EXISTS ix_game_session ON games (session_id)",
+)
+
+
 async def init_db():
-    """Create all tables."""
+    """Create all tables, and add newer indexes to tables that already existed."""
     os.makedirs(os.path.dirname(DATABASE_URL.replace("sqlite+aiosqlite:///", "")), exist_ok=True)
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
+        has_player_index = (await conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ix_player_tg_group'")
+        )).first()
+        if not has_player_index:
+            # Older databases may hold duplicate player rows; keep the most recent one per user and group
+            await conn.execute(text(
+                "DELETE FROM players WHERE id NOT IN "
+                "(SELECT MAX(id) FROM players GROUP BY telegram_id, group_id)"
+            ))
+        for statement in _BACKFILL_INDEXES:
+            await conn.execute(text(statement))
+
 
 async def get_session() -> AsyncSession:
     """Get a new async session."""
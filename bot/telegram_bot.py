@@ -18,6 +18,13 @@ from bot.db_ops import get_leaderboard, ensure_player, save_game_results
 
 logger = logging.getLogger(__name__)
 
+_LOBBY_TEMPLATE = "<b>Domino Game Lobby</b>\n\nPlayers ({count}/{max_players}):\n{players}\n{status}"
+# Lobby status line by number of players still missing (0 = ready)
+_NEED_MSGS = {
+    need: f"\nNeed {need} more player{'s' if need > 1 else ''} to start." for need in range(1, MIN_PLAYERS + 1)
+}
+_NEED_MSGS[0] = "\nReady to start!"
+
 
 def get_base_url():
     """Get the current base URL (may be set after tunnel starts)."""
@@ -88,16 +95,10 @@ async def cmd_scores(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("No games played yet in this group!")
         return
 
-    text = "<b>Leaderboard — All Time</b>\n\n"
-    for i, entry in enumerate(leaderboard, 1):
-        name = entry["display_name"]
-        wins = entry["wins"]
-        if entry["is_fish"]:
-            text += f"{i}. {'Fish'} — {wins} win{'s' if wins != 1 else ''}\n"
-        else:
-            text += f"{i}. {name} — {wins} win{'s' if wins != 1 else ''}\n"
+    lines = ["<b>Leaderboard — All Time</b>", ""]
+    lines.extend(_leaderboard_lines(leaderboard))
 
-    await update.message.reply_text(text, parse_mode=ParseMode.HTML)
+    await update.message.reply_text("\n".join(lines), parse_mode=ParseMode.HTML)
 
 
 # --- Callback Query Handlers ---
@@ -234,24 +235,31 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 # --- Helper Functions ---
 
+def _plural(count: int) -> str:
+    """Return the plural suffix for a count."""
+    return "" if count == 1 else "s"
+
+
+def _leaderboard_lines(leaderboard: list[dict]) -> list[str]:
+    """Format leaderboard entries as numbered "name — N wins" lines."""
+    return [
+        f"{i}. {'Fish' if entry['is_fish'] else entry['display_name']} — {entry['wins']} win{_plural(entry['wins'])}"
+        for i, entry in enumerate(leaderboard, 1)
+    ]
+
+
 def _build_lobby_text(lobby) -> str:
     """Build the lobby status message."""
     player_list = "\n".join(
         f"  {i+1}. {p.display_name}" for i, p in enumerate(lobby.players)
     )
     count = len(lobby.players)
-    status = ""
-    if count < MIN_PLAYERS:
-        need = MIN_PLAYERS - count
-        status = f"\nNeed {need} more player{'s' if need > 1 else ''} to start."
-    else:
-        status = "\nReady to start!"
-
-    return (
-        f"<b>Domino Game Lobby</b>\n\n"
-        f"Players ({count}/{MAX_PLAYERS}):\n{player_list}\n"
-        f"{status}"
-    )
+    return _LOBBY_TEMPLATE.format_map({
+        "count": count,
+        "max_players": MAX_PLAYERS,
+        "players": player_list,
+        "status": _NEED_MSGS[max(MIN_PLAYERS - count, 0)],
+    })
 
 
 def _build_lobby_keyboard(game_id: str) -> InlineKeyboardMarkup:
@@ -337,32 +345,28 @@ async def on_session_end(result: dict):
     group_id = result["group_id"]
     results = result["results"]
 
-    player_infos = result.get("player_infos", [])
+    name_by_id = {p["telegram_id"]: p["display_name"] for p in result.get("player_infos", [])}
 
-    text = "<b>Session Complete!</b>\n\n"
+    lines = ["<b>Session Complete!</b>", ""]
     for r in results:
         game_num = r["game_number"]
+        winner_id = r["winner_telegram_id"]
         if r["is_fish"]:
-            text += f"Game {game_num}: Fish! (no winner)\n"
-        elif r["winner_telegram_id"]:
-            winner_name = f"Player {r['winner_telegram_id']}"
-            for p in player_infos:
-                if p["telegram_id"] == r["winner_telegram_id"]:
-                    winner_name = p["display_name"]
-                    break
-            text += f"Game {game_num}: {winner_name} wins!\n"
-
-    # Add leaderboard
-    leaderboard = await get_leaderboard(group_id)
+            lines.append(f"Game {game_num}: Fish! (no winner)")
+        elif winner_id:
+            winner_name = name_by_id.get(winner_id, f"Player {winner_id}")
+            lines.append(f"Game {game_num}: {winner_name} wins!")
+
+    # Add leaderboard (already fetched by the web layer when it saved the results)
+    leaderboard = result.get("leaderboard")
+    if leaderboard is None:
+        leaderboard = await get_leaderboard(group_id)
     if leaderboard:
-        text += "\n<b>Updated Leaderboard:</b>\n"
-        for i, entry in enumerate(leaderboard, 1):
-            name = entry["display_name"]
-            wins = entry["wins"]
-            fish_prefix = "" if not entry["is_fish"] else ""
-            text += f"{i}. {fish_prefix}{name} — {wins} win{'s' if wins != 1 else ''}\n"
-
-    await bot_app.bot.send_message(group_id, text, parse_mode=ParseMode.HTML)
+        lines.append("")
+        lines.append("<b>Updated Leaderboard:</b>")
+        lines.extend(_leaderboard_lines(leaderboard))
+
+    await bot_app.bot.send_message(group_id, "\n".join(lines), parse_mode=ParseMode.HTML)
 
 
 def create_bot_app() -> Application:
@@ -10,6 +10,7 @@ const WS = {
     reconnectDelay: 1000,
     onMessage: null,
     pingInterval: null,
+    decoder: new TextDecoder(),
 
     connect(gameId, playerId) {
         this.gameId = gameId;
@@ -21,6 +22,8 @@ const WS = {
         console.log('WS connecting to:', url);
 
         this.socket = new WebSocket(url);
+        // The server sends JSON as binary (UTF-8) frames
+        this.socket.binaryType = 'arraybuffer';
 
         this.socket.onopen = () => {
             console.log('WS connected');
@@ -30,7 +33,8 @@ const WS = {
 
         this.socket.onmessage = (event) => {
             try {
-                const msg = JSON.parse(event.data);
+                const text = typeof event.data === 'string' ? event.data : this.decoder.decode(event.data);
+                const msg = JSON.parse(text);
                 if (msg.type === 'pong') return;
                 if (this.onMessage) {
                     this.onMessage(msg);
@@ -3,34 +3,59 @@ FastAPI web server: serves the Mini App frontend, REST API, and WebSocket.
 """
 
 import asyncio
+import functools
 import hashlib
 import hmac
-import json
 import logging
 import urllib.parse
 from pathlib import Path
+from types import MappingProxyType
+from typing import Optional
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
+import orjson
+from fastapi import Depends, FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse, HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 
 from bot.config import BOT_TOKEN
 from bot.game_manager import game_manager
-from bot.bot_ai import is_bot_player, maybe_play_bot_turns
+from bot.bot_ai import is_bot_player, maybe_play_bot_turns, set_callbacks as set_bot_ai_callbacks
 from web.ws_manager import ws_manager
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Domino Game")
+app = FastAPI(title="Domino Game", default_response_class=ORJSONResponse)
+# Game-state JSON is repetitive and compresses well; level 5 keeps the CPU cost low (HTTP only, not WebSockets)
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=5)
 
 FRONTEND_DIR = Path(__file__).parent.parent / "frontend"
 
+# The HTML pages are static for a deployment — read them once (restart the server to pick up edits)
+INDEX_HTML = (FRONTEND_DIR / "index.html").read_bytes()
+TEST_HTML = (FRONTEND_DIR / "test.html").read_bytes()
+
+_PONG_MESSAGE = orjson.dumps({"type": "pong"})
+
+# initData HMAC key — depends only on the bot token, so derive it once
+_WEBAPP_SECRET = hmac.new(b"WebAppData", BOT_TOKEN.encode(), hashlib.sha256).digest()
+
 
 def validate_init_data(init_data: str) -> dict | None:
     """
     Validate Telegram Mini App initData using HMAC-SHA-256.
     Returns parsed data dict if valid, None otherwise.
     """
+    validated = _validate_init_data_cached(init_data)
+    return dict(validated) if validated is not None else None
+
+
+@functools.lru_cache(maxsize=4096)
+def _validate_init_data_cached(init_data: str) -> Optional[MappingProxyType]:
+    """
+    Validate and parse initData, memoized per raw string (it's stable for a Mini App session).
+    Results are shared between callers, so they're returned as read-only mappings.
+    """
     try:
         parsed = dict(urllib.parse.parse_qsl(init_data, keep_blank_values=True))
         received_hash = parsed.pop("hash", "")
@@ -41,23 +66,24 @@ def validate_init_data(init_data: str) -> dict | None:
         data_check_arr = sorted(parsed.items())
         data_check_string = "\n".join(f"{k}={v}" for k, v in data_check_arr)
 
-        # Create secret key
-        secret_key = hmac.new(b"WebAppData", BOT_TOKEN.encode(), hashlib.sha256).digest()
-        computed_hash = hmac.new(secret_key, data_check_string.encode(), hashlib.sha256).hexdigest()
+        computed_hash = hmac.new(_WEBAPP_SECRET, data_check_string.encode(), hashlib.sha256).hexdigest()
 
         if hmac.compare_digest(computed_hash, received_hash):
             # Parse the user field
             if "user" in parsed:
-                parsed["user"] = json.loads(parsed["user"])
-            return parsed
+                parsed["user"] = MappingProxyType(orjson.loads(parsed["user"]))
+            return MappingProxyType(parsed)
         return None
     except Exception as e:
         logger.error(f"initData validation error: {e}")
         return None
 
 
-def extract_player_id(request: Request) -> int:
-    """Extract and validate player ID from request headers."""
+async def extract_player_id(request: Request) -> int:
+    """
+    Extract and validate player ID from request headers.
+    Used as a FastAPI dependency (async, so it runs inline rather than in the threadpool).
+    """
     init_data = request.headers.get("X-Telegram-Init-Data", "")
     if init_data:
         validated = validate_init_data(init_data)
@@ -75,27 +101,24 @@ def extract_player_id(request: Request) -> int:
 # --- REST API ---
 
 @app.get("/api/game/{game_id}")
-async def get_game_state(game_id: str, request: Request):
+async def get_game_state(game_id: str, player_id: int = Depends(extract_player_id)):
     """Get current game state for a player."""
-    player_id = extract_player_id(request)
     state = game_manager.get_game_state(game_id, for_player_id=player_id)
     if not state:
         raise HTTPException(status_code=404, detail="Game not found")
-    return JSONResponse(state)
+    return ORJSONResponse(state)
 
 
 @app.get("/api/game/{game_id}/moves")
-async def get_valid_moves(game_id: str, request: Request):
+async def get_valid_moves(game_id: str, player_id: int = Depends(extract_player_id)):
     """Get valid moves for the current player."""
-    player_id = extract_player_id(request)
     moves = game_manager.get_valid_moves(game_id, player_id)
-    return JSONResponse({"moves": moves})
+    return ORJSONResponse({"moves": moves})
 
 
 @app.post("/api/game/{game_id}/move")
-async def play_move(game_id: str, request: Request):
+async def play_move(game_id: str, request: Request, player_id: int = Depends(extract_player_id)):
     """Play a tile."""
-    player_id = extract_player_id(request)
     body = await request.json()
     tile = body.get("tile")
     side = body.get("side")
@@ -118,13 +141,12 @@ async def play_move(game_id: str, request: Request):
             game_manager.start_turn_timer(game_id)
             await _trigger_bot_turns(game_id)
 
-    return JSONResponse(result)
+    return ORJSONResponse(result)
 
 
 @app.post("/api/game/{game_id}/pass")
-async def pass_turn(game_id: str, request: Request):
+async def pass_turn(game_id: str, player_id: int = Depends(extract_player_id)):
     """Pass the turn."""
-    player_id = extract_player_id(request)
     result = game_manager.pass_move(game_id, player_id)
 
     if result.get("success"):
@@ -137,13 +159,12 @@ async def pass_turn(game_id: str, request: Request):
             game_manager.start_turn_timer(game_id)
             await _trigger_bot_turns(game_id)
 
-    return JSONResponse(result)
+    return ORJSONResponse(result)
 
 
 @app.post("/api/game/{game_id}/draw")
-async def draw_tile(game_id: str, request: Request):
+async def draw_tile(game_id: str, player_id: int = Depends(extract_player_id)):
     """Draw a tile from the boneyard."""
-    player_id = extract_player_id(request)
     result = game_manager.draw_tile(game_id, player_id)
 
     if result.get("success"):
@@ -152,15 +173,20 @@ async def draw_tile(game_id: str, request: Request):
         # Broadcast updated state (other players see tile count change + boneyard count)
         await _broadcast_state(game_id)
 
-    return JSONResponse(result)
+    return ORJSONResponse(result)
 
 
 async def _broadcast_state(game_id: str):
     """Broadcast personalized game state to all connected players."""
-    await ws_manager.broadcast_game_state(
-        game_id,
-        lambda pid: game_manager.get_game_state(game_id, for_player_id=pid),
-    )
+    # The shared part is built once; each player's view only splices in their own hand
+    public = game_manager.get_public_state(game_id)
+    if public is None:
+        return
+    session = game_manager.get_session(game_id)
+    state = session.engine.state
+    # The turn deadline is part of the payload but changes without a state version bump
+    version = (session.state_version, session.turn_deadline)
+    await ws_manager.broadcast_game_state(game_id, lambda pid: state.with_hand(public, pid), version=version)
 
 
 async def _trigger_bot_turns(game_id: str):
@@ -210,12 +236,11 @@ async def _handle_game_over(game_id: str):
         # Wait for the game-over overlay to display
         await asyncio.sleep(5)
 
-        # Save results to database before fetching leaderboard
-        from bot.db_ops import save_game_results, get_leaderboard
-        await save_game_results(result["group_id"], result["results"])
-
-        # Fetch updated leaderboard to include in session_end event
-        leaderboard = await get_leaderboard(result["group_id"])
+        # Save results and fetch the updated leaderboard in one DB session
+        from bot.db_ops import save_results_and_fetch_leaderboard
+        leaderboard = await save_results_and_fetch_leaderboard(result["group_id"], result["results"])
+        # Passed on so the Telegram summary doesn't query it again
+        result["leaderboard"] = leaderboard
 
         await ws_manager.broadcast_event(game_id, "session_end", {
             "results": result["results"],
@@ -229,6 +254,10 @@ async def _handle_game_over(game_id: str):
         ws_manager.cleanup_game(game_id)
 
 
+# Let AI takeover (triggered from game_manager's turn timer) reach the web layer
+set_bot_ai_callbacks(_broadcast_state, _handle_game_over, _trigger_bot_turns)
+
+
 # --- WebSocket ---
 
 @app.websocket("/ws/{game_id}/{player_id}")
@@ -239,7 +268,7 @@ async def websocket_endpoint(websocket: WebSocket, game_id: str, player_id: int)
     # Send initial state
     state = game_manager.get_game_state(game_id, for_player_id=player_id)
     if state:
-        await websocket.send_text(json.dumps({
+        await websocket.send_bytes(orjson.dumps({
             "type": "game_state",
             "data": state,
         }))
@@ -248,10 +277,10 @@ async def websocket_endpoint(websocket: WebSocket, game_id: str, player_id: int)
         while True:
             # We mostly use REST for moves, but keep the connection alive
             data = await websocket.receive_text()
-            msg = json.loads(data)
+            msg = orjson.loads(data)
 
             if msg.get("type") == "ping":
-                await websocket.send_text(json.dumps({"type": "pong"}))
+                await websocket.send_bytes(_PONG_MESSAGE)
 
     except WebSocketDisconnect:
         ws_manager.disconnect(game_id, player_id)
@@ -287,20 +316,20 @@ async def create_test_game(request: Request):
                 await _trigger_bot_turns(game_id)
             asyncio.create_task(delayed_bot_start())
 
-    return JSONResponse({"game_id": game_id, "player_id": player_id})
+    return ORJSONResponse({"game_id": game_id, "player_id": player_id})
 
 
 @app.get("/test")
 async def serve_test_page():
     """Serve the test mode page."""
-    return FileResponse(FRONTEND_DIR / "test.html")
+    return HTMLResponse(TEST_HTML)
 
 
 # --- Static files ---
 
 @app.get("/")
 async def serve_index():
-    return FileResponse(FRONTEND_DIR / "index.html")
+    return HTMLResponse(INDEX_HTML)
 
 
 # Mount static files AFTER specific routes
@@ -1,9 +1,13 @@
 """
 WebSocket connection manager for real-time game updates.
+Messages are sent as binary frames of UTF-8 JSON (orjson output, no re-encoding).
 """
 
-import json
+import asyncio
 import logging
+from typing import Awaitable, Hashable, Optional
+
+import orjson
 from fastapi import WebSocket
 
 logger = logging.getLogger(__name__)
@@ -15,6 +19,8 @@ class WSManager:
     def __init__(self):
         # game_id -> {player_telegram_id -> WebSocket}
         self.connections: dict[str, dict[int, WebSocket]] = {}
+        # game_id -> {player_telegram_id -> state version last queued to that player's connection}
+        self.last_version: dict[str, dict[int, Hashable]] = {}
 
     async def connect(self, game_id: str, player_id: int, ws: WebSocket):
         """Register a WebSocket connection for a player in a game."""
@@ -22,6 +28,7 @@ class WSManager:
         if game_id not in self.connections:
             self.connections[game_id] = {}
         self.connections[game_id][player_id] = ws
+        self.last_version.get(game_id, {}).pop(player_id, None)  # A new connection hasn't seen any broadcast
         logger.info(f"WS connected: game={game_id}, player={player_id}")
 
     def disconnect(self, game_id: str, player_id: int):
@@ -30,6 +37,10 @@ class WSManager:
             self.connections[game_id].pop(player_id, None)
             if not self.connections[game_id]:
                 del self.connections[game_id]
+        if game_id in self.last_version:
+            self.last_version[game_id].pop(player_id, None)
+            if not self.last_version[game_id]:
+                del self.last_version[game_id]
         logger.info(f"WS disconnected: game={game_id}, player={player_id}")
 
     async def send_personal(self, game_id: str, player_id: int, data: dict):
@@ -37,43 +48,66 @@ class WSManager:
         ws = self.connections.get(game_id, {}).get(player_id)
         if ws:
             try:
-                await ws.send_text(json.dumps(data))
+                await ws.send_bytes(orjson.dumps(data))
             except Exception as e:
                 logger.error(f"WS send error to {player_id}: {e}")
                 self.disconnect(game_id, player_id)
 
-    async def broadcast_game_state(self, game_id: str, game_state_fn):
+    async def broadcast_game_state(self, game_id: str, game_state_fn, version: Optional[Hashable] = None):
         """
         Broadcast personalized game state to all connected players.
         game_state_fn(player_id) -> dict
+        version: identifies the state being sent; players already sent this version are skipped (None = always send)
         """
         conns = self.connections.get(game_id, {})
-        for player_id, ws in list(conns.items()):
+        sent_versions = self.last_version.setdefault(game_id, {}) if version is not None else None
+        sends = []
+        # Snapshot: a failing game_state_fn disconnects the player mid-loop
+        for player_id, ws in tuple(conns.items()):
+            if sent_versions is not None:
+                if sent_versions.get(player_id) == version:
+                    continue
+                sent_versions[player_id] = version
             try:
                 state = game_state_fn(player_id)
                 if state:
-                    await ws.send_text(json.dumps({
+                    message = orjson.dumps({
                         "type": "game_state",
                         "data": state,
-                    }))
+                    })
+                    sends.append((player_id, ws, ws.send_bytes(message)))
             except Exception as e:
                 logger.error(f"WS broadcast error to {player_id}: {e}")
                 self.disconnect(game_id, player_id)
+        await self._send_all(game_id, sends, "WS broadcast error")
 
     async def broadcast_event(self, game_id: str, event_type: str, data: dict):
         """Broadcast the same event to all players in a game."""
         conns = self.connections.get(game_id, {})
-        message = json.dumps({"type": event_type, "data": data})
-        for player_id, ws in list(conns.items()):
-            try:
-                await ws.send_text(message)
-            except Exception as e:
-                logger.error(f"WS event broadcast error to {player_id}: {e}")
-                self.disconnect(game_id, player_id)
+        # Encoded once; every socket is sent the same buffer
+        message = orjson.dumps({"type": event_type, "data": data})
+        sends = [(player_id, ws, ws.send_bytes(message)) for player_id, ws in conns.items()]
+        await self._send_all(game_id, sends, "WS event broadcast error")
+
+    async def _send_all(self, game_id: str, sends: list[tuple[int, WebSocket, Awaitable]], error_label: str):
+        """
+        Await the sends concurrently, so one slow client doesn't delay the others.
+        Connections whose send failed are dropped (unless the player has reconnected meanwhile).
+        sends: [(player_id, ws, send coroutine), ...]
+        """
+        if not sends:
+            return
+        results = await asyncio.gather(*(send for _, _, send in sends), return_exceptions=True)
+        for (player_id, ws, _), result in zip(sends, results):
+            if isinstance(result, Exception):
+                logger.error(f"{error_label} to {player_id}: {result}")
+                if self.connections.get(game_id, {}).get(player_id) is ws:
+                    self.disconnect(game_id, player_id)
 
     def cleanup_game(self, game_id: str):
         """Remove all connections for a game."""
         self.connections.pop(game_id, None)
+        self.last_version.pop(game_id, None)
 
 
 # Singleton